@@ -1,9 +1,13 @@
 import streamlit as st
 import gspread
+import io
+import numpy as np
 import pandas as pd
+from google.auth.transport.requests import AuthorizedSession
 from google.oauth2.service_account import Credentials
-from datetime import datetime, timedelta
+from requests.adapters import HTTPAdapter
 import os
+import time
 import plotly.graph_objects as go
 import plotly.express as px
 
@@ -11,6 +15,26 @@ st.set_page_config(page_title="Analytics", layout="wide")
 
 SCOPES = ['https://www.googleapis.com/auth/spreadsheets', 'https://www.googleapis.com/auth/drive']
 
+DATE_FORMAT = '%Y-%m-%d %H:%M'
+
+NUMERIC_COLS = [
+    'Risk Taking',
+    'Team Dependen',
+    'Goals Understan',
+    'Work Meaning',
+    'Work Impact',
+    'Motivation',
+    'Product Directio',
+    'Manager Appro',
+    'Recommend'
+]
+
+def authorize_client(creds):
+    """Create a gspread client on a pooled, keep-alive HTTP session"""
+    session = AuthorizedSession(creds)
+    session.mount('https://', HTTPAdapter(pool_connections=8, pool_maxsize=32))
+    return gspread.Client(auth=creds, session=session)
+
 @st.cache_resource
 def setup_sheets_client():
     """Initialize Google Sheets client"""
@@ -19,7 +43,7 @@ def setup_sheets_client():
     if "service_account_info" in st.secrets:
         try:
             creds = Credentials.from_service_account_info(dict(st.secrets["service_account_info"]), scopes=SCOPES)
-            return gspread.authorize(creds)
+            return authorize_client(creds)
         except Exception as e:
             st.error(f"❌ Error loading credentials from secrets: {e}")
             st.stop()
@@ -27,7 +51,7 @@ def setup_sheets_client():
     if os.path.exists('service-account.json'):
         try:
             creds = Credentials.from_service_account_file('service-account.json', scopes=SCOPES)
-            return gspread.authorize(creds)
+            return authorize_client(creds)
         except Exception as e:
             st.error(f"❌ Error loading local credentials: {e}")
             st.stop()
@@ -35,6 +59,7 @@ def setup_sheets_client():
     st.error("❌ No credentials found!")
     st.stop()
 
+@st.cache_resource(ttl=3600)
 def get_worksheet():
     """Get the Scores worksheet"""
     try:
@@ -51,35 +76,157 @@ def get_worksheet():
         st.error(f"❌ Error connecting to spreadsheet: {e}")
         st.stop()
 
+def fetch_scores_csv():
+    """Export the Scores worksheet as CSV text"""
+    worksheet = get_worksheet()
+    response = worksheet.client.session.get(
+        f"https://docs.google.com/spreadsheets/d/{worksheet.spreadsheet_id}/gviz/tq",
+        params={'tqx': 'out:csv', 'sheet': worksheet.title, 'headers': 1}
+    )
+    response.raise_for_status()
+    return response.text
+
+def to_scores(frame) -> pd.DataFrame:
+    """Cast sheet cells to 1-5 scores, blanking anything else (see team_health_check.to_scores)"""
+    scores = frame.apply(pd.to_numeric, errors='coerce')
+    return scores.where(scores.ge(1) & scores.le(5) & scores.mod(1).eq(0)).astype('Int8')
+
+@st.cache_data(ttl=60, show_spinner=False)
+def load_scores_df() -> tuple[pd.DataFrame, float]:
+    """Load the Scores worksheet as a typed DataFrame, with the time it was loaded"""
+    loaded_at = time.time()
+    csv_text = fetch_scores_csv()
+
+    if not csv_text.strip():
+        return pd.DataFrame(), loaded_at
+
+    # The C parser builds the frame directly; blanks stay '' as they do in the sheet
+    df = pd.read_csv(io.StringIO(csv_text), dtype={'Date': str}, keep_default_na=False)
+
+    if df.empty:
+        return pd.DataFrame(), loaded_at
+
+    df['Date'] = pd.to_datetime(df['Date'], format=DATE_FORMAT, errors='coerce', cache=True)
+    # Day-level dates stay datetime64 so grouping and filtering never box to datetime.date
+    df['DateOnly'] = df['Date'].dt.normalize()
+
+    numeric_cols = [col for col in NUMERIC_COLS if col in df.columns]
+    df[numeric_cols] = to_scores(df[numeric_cols])
+
+    return df, loaded_at
+
+def filter_scores(df, start, end, teams):
+    """Restrict scores to a date range and, optionally, a set of teams"""
+    filtered_df = df[df['DateOnly'].between(pd.Timestamp(start), pd.Timestamp(end))]
+
+    if teams and 'Teams' in df.columns:
+        filtered_df = filtered_df[filtered_df['Teams'].isin(teams)]
+
+    return filtered_df
+
+@st.cache_data(ttl=60, show_spinner=False)
+def daily_and_team_avg(_df, loaded_at, start, end, teams):
+    """Average scores per day and per team for the selected filters"""
+    # Streamlit doesn't hash _df; loaded_at keys the cache to the snapshot the page is showing
+    df = _df
+    filtered_df = filter_scores(df, start, end, teams)
+    numeric_cols = [col for col in NUMERIC_COLS if col in df.columns]
+
+    daily_avg = filtered_df.groupby('DateOnly')[numeric_cols].mean().astype(float).rename_axis('Date')
+    team_avg = filtered_df.groupby('Teams')[numeric_cols].mean().astype(float) if 'Teams' in df.columns else None
+
+    return daily_avg, team_avg
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def build_trend_fig(daily_avg: pd.DataFrame) -> dict:
+    """Line chart of daily average scores per metric"""
+    daily_long = daily_avg.reset_index().melt(id_vars='Date', var_name='Metric', value_name='Score')
+    fig = px.line(daily_long, x='Date', y='Score', color='Metric', markers=True)
+    fig.update_traces(
+        hovertemplate='<b>%{fullData.name}</b><br>Date: %{x}<br>Score: %{y:.2f}<extra></extra>'
+    )
+    
+    fig.update_layout(
+        height=400,
+        legend_title_text='',
+        hovermode='x unified',
+        xaxis_title="Date",
+        yaxis_title="Average Score (1-5)",
+        template="plotly_white"
+    )
+    return fig.to_dict()
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def build_bar_fig(current_avg: pd.Series) -> dict:
+    """Bar chart of average scores per metric"""
+    fig = go.Figure(data=[
+        go.Bar(
+            x=current_avg.index,
+            y=current_avg.values,
+            marker_color=['#636EFA', '#EF553B', '#00CC96', '#AB63FA', '#FFA15A', '#00B4D8', '#00B4D8', '#90E0EF', '#00B4D8'],
+            text=current_avg.values.round(2),
+            textposition='auto',
+            hovertemplate='<b>%{x}</b><br>Average: %{y:.2f}/5<extra></extra>'
+        )
+    ])
+    
+    fig.update_layout(
+        height=400,
+        showlegend=False,
+        xaxis_title="Category",
+        yaxis_title="Average Score",
+        yaxis=dict(range=[0, 5]),
+        template="plotly_white"
+    )
+    
+    fig.update_xaxes(tickangle=-45)
+    return fig.to_dict()
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def build_team_fig(team_avg: pd.DataFrame) -> dict:
+    """Grouped bar chart comparing average scores across teams"""
+    team_long = team_avg.reset_index().melt(id_vars='Teams', var_name='Metric', value_name='Score')
+    fig = px.bar(team_long, x='Teams', y='Score', color='Metric', barmode='group')
+    fig.update_traces(
+        hovertemplate='<b>%{x}</b><br>%{fullData.name}: %{y:.2f}<extra></extra>'
+    )
+    
+    fig.update_layout(
+        height=400,
+        legend_title_text='',
+        xaxis_title="Team",
+        yaxis_title="Average Score",
+        yaxis=dict(range=[0, 5]),
+        template="plotly_white"
+    )
+    return fig.to_dict()
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def build_pie_fig(approach_counts: np.ndarray) -> dict:
+    """Pie chart of manager approach responses, from counts indexed by score"""
+    approach_labels = {1: "Too directive", 3: "Just right", 5: "Too hands off"}
+    scores = np.flatnonzero(approach_counts)
+    
+    fig = go.Figure(data=[
+        go.Pie(
+            labels=[approach_labels.get(int(score), f"Score {score}") for score in scores],
+            values=approach_counts[scores],
+            hovertemplate='<b>%{label}</b><br>Count: %{value}<extra></extra>'
+        )
+    ])
+    
+    fig.update_layout(height=400)
+    return fig.to_dict()
+
 # Page Header
 st.title("📊 Team Health Analytics")
 st.markdown("Visualize team health trends and insights")
 
 try:
-    worksheet = get_worksheet()
-    all_data = worksheet.get_all_values()
+    df, loaded_at = load_scores_df()
 
-    if len(all_data) > 1:
-        # Parse data
-        df = pd.DataFrame(all_data[1:], columns=all_data[0])
-        df['Date'] = pd.to_datetime(df['Date'])
-        
-        numeric_cols = [
-            'Risk Taking',
-            'Team Dependen',
-            'Goals Understan',
-            'Work Meaning',
-            'Work Impact',
-            'Motivation',
-            'Product Directio',
-            'Manager Appro',
-            'Recommend'
-        ]
-        
-        numeric_cols = [col for col in numeric_cols if col in df.columns]
-        
-        for col in numeric_cols:
-            df[col] = pd.to_numeric(df[col], errors='coerce')
+    if not df.empty:
+        numeric_cols = [col for col in NUMERIC_COLS if col in df.columns]
         
         st.divider()
         st.subheader("📈 Key Metrics")
@@ -90,48 +237,49 @@ try:
             st.metric("Total Submissions", len(df))
         
         with col2:
-            st.metric("Unique Days", df['Date'].dt.date.nunique())
+            st.metric("Unique Days", df['DateOnly'].nunique())
         
         with col3:
             if 'Teams' in df.columns:
                 st.metric("Teams", df['Teams'].nunique())
         
         with col4:
-            today = datetime.now().strftime('%Y-%m-%d')
-            today_count = len(df[df['Date'].dt.strftime('%Y-%m-%d') == today])
+            today_count = int((df['DateOnly'] == pd.Timestamp.today().normalize()).sum())
             st.metric("Today's Submissions", today_count)
         
         st.divider()
         
         st.subheader("🔍 Filters")
         
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            date_range = st.date_input(
-                "Select Date Range",
-                value=(df['Date'].min().date(), df['Date'].max().date()),
-                key="date_range"
-            )
-        
-        with col2:
-            if 'Teams' in df.columns:
-                teams = st.multiselect(
-                    "Select Teams",
-                    options=df['Teams'].unique(),
-                    default=df['Teams'].unique(),
-                    key="teams"
+        # Filters sit in a form so picking dates or teams only reruns the page on Apply
+        with st.form("filters"):
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                date_range = st.date_input(
+                    "Select Date Range",
+                    value=(df['DateOnly'].min().date(), df['DateOnly'].max().date()),
+                    key="date_range"
                 )
-            else:
-                teams = None
-        
-        filtered_df = df[
-            (df['Date'].dt.date >= date_range[0]) & 
-            (df['Date'].dt.date <= date_range[1])
-        ]
+            
+            with col2:
+                if 'Teams' in df.columns:
+                    teams = st.multiselect(
+                        "Select Teams",
+                        options=df['Teams'].unique(),
+                        default=df['Teams'].unique(),
+                        key="teams"
+                    )
+                else:
+                    teams = None
+            
+            st.form_submit_button("Apply Filters")
         
-        if teams and 'Teams' in df.columns:
-            filtered_df = filtered_df[filtered_df['Teams'].isin(teams)]
+        # A half-picked range has only a start date; treat it as a single day
+        start_date, end_date = date_range[0], date_range[-1]
+        # Sorted tuple gives the aggregation cache a stable key
+        teams_key = tuple(sorted(teams)) if teams else None
+        filtered_df = filter_scores(df, start_date, end_date, teams_key)
         
         st.divider()
         
@@ -139,84 +287,24 @@ try:
             
             st.subheader("📉 Average Scores Over Time")
             
-            daily_avg = filtered_df.groupby(filtered_df['Date'].dt.date)[numeric_cols].mean()
+            daily_avg, team_avg = daily_and_team_avg(df, loaded_at, start_date, end_date, teams_key)
             
-            fig_trend = go.Figure()
-            for col in numeric_cols:
-                fig_trend.add_trace(go.Scatter(
-                    x=daily_avg.index,
-                    y=daily_avg[col],
-                    mode='lines+markers',
-                    name=col,
-                    hovertemplate='<b>%{fullData.name}</b><br>Date: %{x}<br>Score: %{y:.2f}<extra></extra>'
-                ))
-            
-            fig_trend.update_layout(
-                height=400,
-                hovermode='x unified',
-                xaxis_title="Date",
-                yaxis_title="Average Score (1-5)",
-                template="plotly_white"
-            )
-            
-            st.plotly_chart(fig_trend, use_container_width=True)
+            st.plotly_chart(build_trend_fig(daily_avg), use_container_width=True)
             
             st.divider()
             
             st.subheader("📊 Current Average Scores")
             
-            current_avg = filtered_df[numeric_cols].mean()
-            
-            fig_bar = go.Figure(data=[
-                go.Bar(
-                    x=current_avg.index,
-                    y=current_avg.values,
-                    marker_color=['#636EFA', '#EF553B', '#00CC96', '#AB63FA', '#FFA15A', '#00B4D8', '#00B4D8', '#90E0EF', '#00B4D8'],
-                    text=current_avg.values.round(2),
-                    textposition='auto',
-                    hovertemplate='<b>%{x}</b><br>Average: %{y:.2f}/5<extra></extra>'
-                )
-            ])
-            
-            fig_bar.update_layout(
-                height=400,
-                showlegend=False,
-                xaxis_title="Category",
-                yaxis_title="Average Score",
-                yaxis=dict(range=[0, 5]),
-                template="plotly_white"
-            )
-            
-            fig_bar.update_xaxes(tickangle=-45)
+            current_avg = filtered_df[numeric_cols].mean().astype(float)
             
-            st.plotly_chart(fig_bar, use_container_width=True)
+            st.plotly_chart(build_bar_fig(current_avg), use_container_width=True)
             
             st.divider()
             
             if 'Teams' in df.columns and len(teams) > 1:
                 st.subheader("🤝 Team Comparison")
                 
-                team_avg = filtered_df.groupby('Teams')[numeric_cols].mean()
-                
-                fig_team = go.Figure()
-                for col in numeric_cols:
-                    fig_team.add_trace(go.Bar(
-                        name=col,
-                        x=team_avg.index,
-                        y=team_avg[col],
-                        hovertemplate='<b>%{x}</b><br>%{fullData.name}: %{y:.2f}<extra></extra>'
-                    ))
-                
-                fig_team.update_layout(
-                    height=400,
-                    barmode='group',
-                    xaxis_title="Team",
-                    yaxis_title="Average Score",
-                    yaxis=dict(range=[0, 5]),
-                    template="plotly_white"
-                )
-                
-                st.plotly_chart(fig_team, use_container_width=True)
+                st.plotly_chart(build_team_fig(team_avg), use_container_width=True)
                 
                 st.divider()
             
@@ -224,19 +312,10 @@ try:
             
             manager_approach_col = 'Manager Appro'
             if manager_approach_col in df.columns:
-                approach_counts = filtered_df[manager_approach_col].value_counts().sort_index()
-                approach_labels = {1: "Too directive", 3: "Just right", 5: "Too hands off"}
-                
-                fig_pie = go.Figure(data=[
-                    go.Pie(
-                        labels=[approach_labels.get(int(idx), f"Score {idx}") for idx in approach_counts.index],
-                        values=approach_counts.values,
-                        hovertemplate='<b>%{label}</b><br>Count: %{value}<extra></extra>'
-                    )
-                ])
+                approaches = filtered_df[manager_approach_col].dropna().to_numpy(dtype=np.int8)
+                approach_counts = np.bincount(approaches, minlength=6)
                 
-                fig_pie.update_layout(height=400)
-                st.plotly_chart(fig_pie, use_container_width=True)
+                st.plotly_chart(build_pie_fig(approach_counts), use_container_width=True)
                 
                 st.divider()
             
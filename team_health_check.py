@@ -1,9 +1,21 @@
 import streamlit as st
 import gspread
+import pandas as pd
+from gspread.utils import ValueRenderOption, absolute_range_name, fill_gaps
+from google.auth.transport.requests import AuthorizedSession
 from google.oauth2.service_account import Credentials
+from requests.adapters import HTTPAdapter
+from streamlit.runtime.scriptrunner import StopException
 from datetime import datetime
+from pathlib import Path
+import atexit
+import bisect
 import json
+import logging
 import os
+import queue
+import threading
+import time
 
 st.set_page_config(page_title="Booking Guild Team Health", layout="centered")
 
@@ -12,22 +24,71 @@ if 'submitted' not in st.session_state:
 
 SCOPES = ['https://www.googleapis.com/auth/spreadsheets', 'https://www.googleapis.com/auth/drive']
 
-RESPONSE_SCORES = {
-    "Strongly disagree": 1,
-    "Disagree": 2,
-    "Neutral": 3,
-    "Agree": 4,
-    "Strongly agree": 5
-}
+# Radios take the scores themselves as options and only display these labels
+LIKERT_LABELS = dict(enumerate(("Strongly disagree", "Disagree", "Neutral", "Agree", "Strongly agree"), start=1))
 
-MANAGER_SCORES = {
-    "Too directive": 1,
-    "Just right": 3,
-    "Too hands off": 5
-}
+MANAGER_LABELS = {1: "Too directive", 3: "Just right", 5: "Too hands off"}
+
+LIKERT_OPTIONS = tuple(LIKERT_LABELS)
+
+MANAGER_OPTIONS = tuple(MANAGER_LABELS)
+
+# Response keys in the order their scores are written to the sheet
+SCORE_KEYS = (
+    'risk_taking',
+    'team_dependence',
+    'goals_understanding',
+    'work_meaning',
+    'work_impact',
+    'motivation',
+    'product_direction',
+    'manager_approach',
+    'recommend'
+)
+
+DATE_FORMAT = '%Y-%m-%d %H:%M'
+
+# The background writer waits BATCH_WINDOW_SECONDS after a submission so a burst
+# shares one append request, and RETRY_DELAY_SECONDS before retrying a failed batch
+BATCH_WINDOW_SECONDS = 2
+RETRY_DELAY_SECONDS = 30
+
+# Survives process restarts so a fresh container can skip one-off Sheets checks
+STATE_FILE = Path.home() / '.cache' / 'healthcheck' / 'state.json'
 
 TEAM_OPTIONS = ["Flights", "Hotels"]
 
+HEADERS = [
+    'Date',
+    'Risk Taking (1-5)',
+    'Team Dependence (1-5)',
+    'Goals Understanding (1-5)',
+    'Work Meaning (1-5)',
+    'Work Impact (1-5)',
+    'Motivation (1-5)',
+    'Product Direction (1-5)',
+    'Manager Approach (1-5)',
+    'Recommend (1-5)',
+    'Team'
+]
+
+SUMMARY_CATEGORIES = {
+    '💬 Risk Taking': 'Risk Taking (1-5)',
+    '🤝 Team Dependence': 'Team Dependence (1-5)',
+    '🎯 Goals Understanding': 'Goals Understanding (1-5)',
+    '✨ Work Meaning': 'Work Meaning (1-5)',
+    '📊 Work Impact': 'Work Impact (1-5)',
+    '⚡ Motivation': 'Motivation (1-5)',
+    '🧭 Product Direction': 'Product Direction (1-5)',
+    '❤️ Recommend': 'Recommend (1-5)'
+}
+
+def authorize_client(creds):
+    """Create a gspread client on a pooled, keep-alive HTTP session"""
+    session = AuthorizedSession(creds)
+    session.mount('https://', HTTPAdapter(pool_connections=8, pool_maxsize=32))
+    return gspread.Client(auth=creds, session=session)
+
 @st.cache_resource
 def setup_sheets_client():
     """Initialize Google Sheets client"""
@@ -37,7 +98,7 @@ def setup_sheets_client():
     if "service_account_info" in st.secrets:
         try:
             creds = Credentials.from_service_account_info(dict(st.secrets["service_account_info"]), scopes=SCOPES)
-            return gspread.authorize(creds)
+            return authorize_client(creds)
         except Exception as e:
             st.error(f"❌ Error loading credentials from secrets: {e}")
             st.stop()
@@ -46,7 +107,7 @@ def setup_sheets_client():
     if os.path.exists('service-account.json'):
         try:
             creds = Credentials.from_service_account_file('service-account.json', scopes=SCOPES)
-            return gspread.authorize(creds)
+            return authorize_client(creds)
         except Exception as e:
             st.error(f"❌ Error loading local credentials: {e}")
             st.stop()
@@ -54,71 +115,182 @@ def setup_sheets_client():
     st.error("❌ No credentials found!")
     st.stop()
 
+@st.cache_resource(ttl=3600)
+def open_worksheet():
+    """Open the Scores worksheet, raising on failure so background threads can recover"""
+    client = setup_sheets_client()
+    spreadsheet_id = os.environ.get("SPREADSHEET_ID") or st.secrets.get("SPREADSHEET_ID")
+
+    if not spreadsheet_id:
+        raise RuntimeError("SPREADSHEET_ID not found in environment or secrets")
+
+    return client.open_by_key(spreadsheet_id).worksheet('Scores')
+
 def get_worksheet():
     """Get the Scores worksheet"""
     try:
-        client = setup_sheets_client()
-        spreadsheet_id = os.environ.get("SPREADSHEET_ID") or st.secrets.get("SPREADSHEET_ID")
-
-        if not spreadsheet_id:
-            st.error("❌ SPREADSHEET_ID not found in environment or secrets")
-            st.stop()
-
-        sheet = client.open_by_key(spreadsheet_id)
-        return sheet.worksheet('Scores')
+        return open_worksheet()
     except Exception as e:
         st.error(f"❌ Error connecting to spreadsheet: {e}")
         st.stop()
 
+def to_scores(frame) -> pd.DataFrame:
+    """Cast sheet cells to 1-5 scores, blanking anything else"""
+    # Scores are 1-5, so a nullable Int8 keeps blanks as <NA> at one byte per cell;
+    # hand-edited cells that aren't whole numbers in that range become <NA> too
+    scores = frame.apply(pd.to_numeric, errors='coerce')
+    return scores.where(scores.ge(1) & scores.le(5) & scores.mod(1).eq(0)).astype('Int8')
+
+@st.cache_data(ttl=3600, max_entries=1, show_spinner=False)
+def find_first_row(date_str) -> int:
+    """Sheet row where date_str's submissions start, found by bisecting the Date column"""
+    # Rows are appended in time order and DATE_FORMAT sorts lexically, so column A is sorted
+    dates = get_worksheet().col_values(1)
+    return bisect.bisect_left(dates, date_str, lo=1) + 1
+
+@st.cache_data(ttl=30, show_spinner=False)
+def fetch_today_entries(date_str) -> pd.DataFrame:
+    """Load the submissions made on date_str (YYYY-MM-DD) as a typed DataFrame"""
+    # Only today's rows come over the wire, however long the sheet's history gets
+    rows = get_worksheet().get(
+        f'A{find_first_row(date_str)}:K',
+        value_render_option=ValueRenderOption.unformatted
+    )
+    # An empty range comes back as [[]], and trailing blank cells are trimmed from rows
+    rows = fill_gaps([row for row in rows if row], cols=len(HEADERS))
+
+    # Columns are positional so the frame doesn't depend on the sheet's header text
+    df = pd.DataFrame([row[:len(HEADERS)] for row in rows], columns=HEADERS)
+    df['Date'] = pd.to_datetime(df['Date'], format=DATE_FORMAT, errors='coerce', cache=True)
+    df = df.loc[df['Date'].dt.normalize() == pd.Timestamp(date_str)].copy()
+    df[HEADERS[1:-1]] = to_scores(df[HEADERS[1:-1]])
+
+    return df
+
+def append_rows(rows):
+    """Write rows to Google Sheets in a single append request"""
+    worksheet = open_worksheet()
+    worksheet.spreadsheet.values_append(
+        absolute_range_name(worksheet.title, 'A:K'),
+        params={'valueInputOption': 'RAW', 'insertDataOption': 'INSERT_ROWS'},
+        body={'values': rows}
+    )
+    fetch_today_entries.clear()
+
+def drain_queue(submission_q):
+    """Take every row currently waiting in the queue"""
+    rows = []
+    while True:
+        try:
+            rows.append(submission_q.get_nowait())
+        except queue.Empty:
+            return rows
+
+def flush_writer(writer):
+    """Write the in-flight batch plus anything still queued; rows stay in flight if the append fails"""
+    # Held across the append so the atexit flush waits for the thread instead of duplicating its batch
+    with writer['flush_lock']:
+        writer['in_flight'].extend(drain_queue(writer['queue']))
+        if writer['in_flight']:
+            append_rows(writer['in_flight'])
+            writer['in_flight'].clear()
+
+def write_submissions(writer):
+    """Background writer: batch queued rows into append requests, forever"""
+    while True:
+        if not writer['in_flight']:
+            row = writer['queue'].get()
+            with writer['flush_lock']:
+                writer['in_flight'].append(row)
+            time.sleep(BATCH_WINDOW_SECONDS)
+
+        try:
+            flush_writer(writer)
+        except (Exception, StopException) as e:
+            # st.stop() in setup_sheets_client raises StopException, which is not an Exception
+            logging.getLogger(__name__).exception(
+                "Failed to append %d submission(s), retrying in %ss", len(writer['in_flight']), RETRY_DELAY_SECONDS)
+            reset_on_auth_error(e)
+            time.sleep(RETRY_DELAY_SECONDS)
+
+@st.cache_resource
+def get_submission_writer():
+    """Process-wide queue of rows to write, the batch being written and the thread draining it"""
+    writer = {
+        'queue': queue.Queue(),
+        'in_flight': [],
+        'thread': None,
+        'lock': threading.Lock(),
+        'flush_lock': threading.Lock(),
+    }
+    atexit.register(flush_writer, writer)
+    return writer
+
+def get_submission_queue():
+    """Return the submission queue, (re)starting its writer thread if it isn't running"""
+    writer = get_submission_writer()
+    with writer['lock']:
+        if writer['thread'] is None or not writer['thread'].is_alive():
+            writer['thread'] = threading.Thread(target=write_submissions, args=(writer,), daemon=True)
+            writer['thread'].start()
+    return writer['queue']
+
 def add_score_entry(responses):
-    """Add score entry to Google Sheets"""
-    try:
-        worksheet = get_worksheet()
-        date = datetime.now().strftime('%Y-%m-%d %H:%M')
-        
-        row = [
-            date,
-            RESPONSE_SCORES.get(responses['risk_taking'], 0),
-            RESPONSE_SCORES.get(responses['team_dependence'], 0),
-            RESPONSE_SCORES.get(responses['goals_understanding'], 0),
-            RESPONSE_SCORES.get(responses['work_meaning'], 0),
-            RESPONSE_SCORES.get(responses['work_impact'], 0),
-            RESPONSE_SCORES.get(responses['motivation'], 0),
-            RESPONSE_SCORES.get(responses['product_direction'], 0),
-            MANAGER_SCORES.get(responses['manager_approach'], 0),
-            RESPONSE_SCORES.get(responses['recommend'], 0),
-            responses['team']
-        ]
-        worksheet.append_row(row)
-        return True
-    except Exception as e:
-        st.error(f"Error saving to sheet: {e}")
-        return False
+    """Queue a score entry for the background writer"""
+    date = datetime.now().strftime(DATE_FORMAT)
+    
+    row = [date, *(responses[key] for key in SCORE_KEYS), responses['team']]
+    # The writer thread does the network I/O, so the user isn't kept waiting on Sheets
+    get_submission_queue().put(row)
 
 def initialize_headers():
     """Initialize sheet headers if needed"""
+    worksheet = get_worksheet()
+    existing = worksheet.row_values(1)
+    if not existing:
+        worksheet.update(values=[HEADERS], range_name='A1:K1')
+    elif existing[0] != 'Date':
+        # Row 1 holds a submission; push it down rather than overwrite it
+        worksheet.insert_row(HEADERS, 1)
+        find_first_row.clear()
+
+def read_state():
+    """Read the local state file, or an empty dict if it is missing or unreadable"""
     try:
-        worksheet = get_worksheet()
-        if worksheet.cell(1, 1).value != 'Date':
-            headers = [
-                'Date',
-                'Risk Taking (1-5)',
-                'Team Dependence (1-5)',
-                'Goals Understanding (1-5)',
-                'Work Meaning (1-5)',
-                'Work Impact (1-5)',
-                'Motivation (1-5)',
-                'Product Direction (1-5)',
-                'Manager Approach (1-5)',
-                'Recommend (1-5)',
-                'Team'
-            ]
-            worksheet.insert_row(headers, 1)
-            st.info("✓ Headers initialized")
-    except Exception as e:
-        st.warning(f"Could not initialize headers: {e}")
+        return json.loads(STATE_FILE.read_text())
+    except (OSError, ValueError):
+        return {}
+
+def write_state(**updates):
+    """Merge updates into the local state file, ignoring filesystem errors"""
+    try:
+        STATE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        STATE_FILE.write_text(json.dumps({**read_state(), **updates}))
+    except OSError:
+        pass
+
+@st.cache_resource
+def headers_initialized():
+    """Run the header check at most once per process, and once ever per spreadsheet"""
+    spreadsheet_id = get_worksheet().spreadsheet_id
+    if read_state().get('headers_ok') != spreadsheet_id:
+        initialize_headers()
+        write_state(headers_ok=spreadsheet_id)
+    return True
 
-initialize_headers()
+def reset_on_auth_error(error):
+    """Drop the cached Sheets handles if Google rejected our credentials"""
+    response = getattr(error, 'response', None)
+    if getattr(response, 'status_code', None) in (401, 403):
+        open_worksheet.clear()
+        setup_sheets_client.clear()
+        find_first_row.clear()
+
+try:
+    headers_initialized()
+except Exception as e:
+    reset_on_auth_error(e)
+    st.warning(f"Could not initialize headers: {e}")
 
 # UI
 st.title("🏥 Booking Guild Team Health Check")
@@ -150,7 +322,8 @@ with st.form("healthcheck_form"):
     st.markdown("**1. I feel I can take risks and make mistakes.**")
     risk_taking = st.radio(
         "Risk Taking",
-        options=["Strongly disagree", "Disagree", "Neutral", "Agree", "Strongly agree"],
+        options=LIKERT_OPTIONS,
+        format_func=LIKERT_LABELS.get,
         label_visibility="collapsed",
         key="q1"
     )
@@ -160,7 +333,8 @@ with st.form("healthcheck_form"):
     st.markdown("**2. I can depend upon my team members.**")
     team_dependence = st.radio(
         "Team Dependence",
-        options=["Strongly disagree", "Disagree", "Neutral", "Agree", "Strongly agree"],
+        options=LIKERT_OPTIONS,
+        format_func=LIKERT_LABELS.get,
         label_visibility="collapsed",
         key="q2"
     )
@@ -170,7 +344,8 @@ with st.form("healthcheck_form"):
     st.markdown("**3. I understand the goals of the company, the team, and how my role helps achieve them.**")
     goals_understanding = st.radio(
         "Goals Understanding",
-        options=["Strongly disagree", "Disagree", "Neutral", "Agree", "Strongly agree"],
+        options=LIKERT_OPTIONS,
+        format_func=LIKERT_LABELS.get,
         label_visibility="collapsed",
         key="q3"
     )
@@ -180,7 +355,8 @@ with st.form("healthcheck_form"):
     st.markdown("**4. I find meaning in the work I do.**")
     work_meaning = st.radio(
         "Work Meaning",
-        options=["Strongly disagree", "Disagree", "Neutral", "Agree", "Strongly agree"],
+        options=LIKERT_OPTIONS,
+        format_func=LIKERT_LABELS.get,
         label_visibility="collapsed",
         key="q4"
     )
@@ -190,7 +366,8 @@ with st.form("healthcheck_form"):
     st.markdown("**5. I believe the work I'm doing makes an impact to the company.**")
     work_impact = st.radio(
         "Work Impact",
-        options=["Strongly disagree", "Disagree", "Neutral", "Agree", "Strongly agree"],
+        options=LIKERT_OPTIONS,
+        format_func=LIKERT_LABELS.get,
         label_visibility="collapsed",
         key="q5"
     )
@@ -200,7 +377,8 @@ with st.form("healthcheck_form"):
     st.markdown("**6. I'm motivated.**")
     motivation = st.radio(
         "Motivation",
-        options=["Strongly disagree", "Disagree", "Neutral", "Agree", "Strongly agree"],
+        options=LIKERT_OPTIONS,
+        format_func=LIKERT_LABELS.get,
         label_visibility="collapsed",
         key="q6"
     )
@@ -210,7 +388,8 @@ with st.form("healthcheck_form"):
     st.markdown("**7. I'm getting the product direction I need.**")
     product_direction = st.radio(
         "Product Direction",
-        options=["Strongly disagree", "Disagree", "Neutral", "Agree", "Strongly agree"],
+        options=LIKERT_OPTIONS,
+        format_func=LIKERT_LABELS.get,
         label_visibility="collapsed",
         key="q7"
     )
@@ -220,7 +399,8 @@ with st.form("healthcheck_form"):
     st.markdown("**8. I find my engineering manager's approach to be:**")
     manager_approach = st.radio(
         "Manager Approach",
-        options=["Too directive", "Just right", "Too hands off"],
+        options=MANAGER_OPTIONS,
+        format_func=MANAGER_LABELS.get,
         label_visibility="collapsed",
         key="q8"
     )
@@ -230,7 +410,8 @@ with st.form("healthcheck_form"):
     st.markdown("**9. I'd recommend working in the Bookings Guild to my network**")
     recommend = st.radio(
         "Recommend",
-        options=["Strongly disagree", "Disagree", "Neutral", "Agree", "Strongly agree"],
+        options=LIKERT_OPTIONS,
+        format_func=LIKERT_LABELS.get,
         label_visibility="collapsed",
         key="q9"
     )
@@ -253,67 +434,52 @@ with st.form("healthcheck_form"):
             'team': team
         }
         
-        if add_score_entry(responses):
-            st.session_state.submitted = True
-            st.success("✅ Thank you! Your response has been recorded.", icon="✅")
-            st.balloons()
-        else:
-            st.error("Failed to submit. Please try again.")
+        add_score_entry(responses)
+        st.session_state.submitted = True
+        st.success("✅ Thank you! Your response has been submitted and will appear in the summary shortly.", icon="✅")
+        st.balloons()
 
 st.divider()
 st.subheader("📊 Session Summary")
 
-try:
-    worksheet = get_worksheet()
-    all_data = worksheet.get_all_values()
-
-    if len(all_data) > 1:
-        today = datetime.now().strftime('%Y-%m-%d')
-        today_entries = [row for row in all_data[1:] if row[0].startswith(today)]
+# A fragment reruns on its own schedule, so the summary refreshes without rerunning the form
+@st.fragment(run_every=30)
+def render_summary():
+    """Show today's submission count, average scores and team breakdown"""
+    try:
+        today_df = fetch_today_entries(datetime.now().strftime('%Y-%m-%d'))
 
-        if today_entries:
-            st.info(f"✓ {len(today_entries)} team members have submitted today")
+        if not today_df.empty:
+            st.info(f"✓ {len(today_df)} team members have submitted today")
 
             # Calculate and display average scores
             try:
-                categories = {
-                    '💬 Risk Taking': 1,
-                    '🤝 Team Dependence': 2,
-                    '🎯 Goals Understanding': 3,
-                    '✨ Work Meaning': 4,
-                    '📊 Work Impact': 5,
-                    '⚡ Motivation': 6,
-                    '🧭 Product Direction': 7,
-                    '❤️ Recommend': 9
+                avgs = today_df[list(SUMMARY_CATEGORIES.values())].mean().astype(float)
+                avg_scores = {
+                    label: avgs[col]
+                    for label, col in SUMMARY_CATEGORIES.items()
+                    if pd.notna(avgs[col])
                 }
-                
-                avg_scores = {}
-                for label, col_index in categories.items():
-                    scores = [float(row[col_index]) for row in today_entries if col_index < len(row) and row[col_index]]
-                    if scores:
-                        avg_scores[label] = sum(scores) / len(scores)
 
                 # Display in 2 columns
                 cols = st.columns(2)
                 for idx, (label, score) in enumerate(avg_scores.items()):
                     with cols[idx % 2]:
                         st.metric(label, f"{score:.1f}/5")
-                
+            
                 # Team breakdown
                 st.markdown("**Team Breakdown:**")
-                team_counts = {}
-                for row in today_entries:
-                    team = row[-1] if row[-1] else "Unknown"
-                    team_counts[team] = team_counts.get(team, 0) + 1
-                
+                team_counts = today_df['Team'].fillna('').replace('', "Unknown").value_counts(sort=False)
+            
                 for team, count in team_counts.items():
                     st.write(f"- {team}: {count} submission(s)")
-                    
+                
             except Exception as avg_error:
                 st.warning(f"Could not calculate averages: {avg_error}")
         else:
             st.info("No submissions today yet. Be the first to share your feedback!")
-    else:
-        st.info("Sheet is empty. Be the first to submit!")
-except Exception as e:
-    st.warning(f"Could not load summary: {e}")
\ No newline at end of file
+    except Exception as e:
+        reset_on_auth_error(e)
+        st.warning(f"Could not load summary: {e}")
+
+render_summary()
\ No newline at end of file
@@ -1,14 +1,16 @@
 import json
+import sys
 
 with open('service-account.json', 'r') as f:
     data = json.load(f)
 
-print('SPREADSHEET_ID = "your-spreadsheet-id-here"\n')
-print('[service_account_info]')
+lines = ['SPREADSHEET_ID = "your-spreadsheet-id-here"', '', '[service_account_info]']
 for key, value in data.items():
     if key == 'private_key':
-        print(f'{key} = """{value}"""')
+        lines.append(f'{key} = """{value}"""')
     elif isinstance(value, str):
-        print(f'{key} = "{value}"')
+        lines.append(f'{key} = "{value}"')
     else:
-        print(f'{key} = {value}')
\ No newline at end of file
+        lines.append(f'{key} = {value}')
+
+sys.stdout.write('\n'.join(lines) + '\n')